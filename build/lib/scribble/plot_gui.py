@@ -1,18 +1,77 @@
 import os
 import threading
-from casacore.tables import table
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from functools import lru_cache, partial
+from casacore.tables import table, tablecolumn
 import numpy as np
+import numba
+from numba import njit, prange
+import dask.dataframe as dd
+from bokeh.events import RangesUpdate
 from bokeh.layouts import row, column
-from bokeh.models import Button, Select, MultiSelect, Div, TextInput
+from bokeh.models import Button, Select, MultiSelect, Div, TextInput, Range1d
 from bokeh.plotting import figure
 import datashader as ds
 import datashader.transfer_functions as tf
+from colorcet import fire
 
 VIS_COLUMNS = ["DATA", "CORRECTED_DATA", "MODEL_DATA", "RESIDUAL_DATA"]
+PRECISE_COLUMNS = ["TIME", "TIME_CENTROID"]  # float32 can't resolve MJD seconds
 
-def load_ms_columns(ms_path):
-    t = table(ms_path)
+# POLARIZATION CORR_TYPE (casacore Stokes enum) -> label
+CORR_NAMES = np.array([str(i) for i in range(13)], dtype=object)
+CORR_NAMES[5:13] = ["RR", "RL", "LR", "LL", "XX", "XY", "YX", "YY"]
+MAX_ELEMENTS = 2**29  # per getcol() call
+GATHER_SLOTS = 4  # columns compacted per pass over the flags
+
+# MS reads and aggregation run here, off the Bokeh document thread
+executor = ThreadPoolExecutor(max_workers=1)
+
+# Parallel kernels are only ever launched from the executor's single thread, which
+# workqueue supports; TBB launched off the main thread hangs interpreter exit
+numba.config.THREADING_LAYER = 'workqueue'
+
+# Aggregation pyramid at 1x, 2x and 4x the plot resolution. Only the finest level is
+# aggregated from the data; counts add up, so coarser levels are exact block sums.
+PLOT_WIDTH, PLOT_HEIGHT = 800, 450
+PYRAMID_LEVELS = [1, 2, 4]
+
+# Fixed canvas and reduction, so datashader's compiled aggregation is reused across plots
+CANVAS = ds.Canvas(plot_width=PLOT_WIDTH * PYRAMID_LEVELS[-1],
+                   plot_height=PLOT_HEIGHT * PYRAMID_LEVELS[-1])
+REDUCTION = ds.count()
+# Each dask partition aggregates into its own full canvas (~23 MB), so partitions
+# get at least this many points (~32 MB of float32 x/y) before another is added
+MIN_PARTITION_POINTS = 4 * 1024**2
+
+# Visibility amplitudes (+ flags) kept in memory, keyed on (ms_path, column, flag_col)
+COLUMN_CACHE_BYTES = 2 * 1024**3
+CACHE_READ_BYTES = 64 * 1024**2  # per getcol() while filling the cache
+TILE_CACHE_BYTES = 4 * 1024**2  # casacore's per-column tile cache for array columns
+column_cache = OrderedDict()
+column_cache_lock = threading.Lock()
+
+def open_table(path):
+    # One-shot read-only access: no open message, no read locks
+    return table(path, readonly=True, ack=False, lockoptions='autonoread')
+
+def limit_tile_cache(t, cols):
+    # Array columns are read once, front to back, so a large tile cache only holds
+    # data that is never read again. 0 would mean unlimited, so keep a small size.
+    for c in cols:
+        if t.isscalarcol(c):
+            continue
+        try:
+            t.setmaxcachesize(c, TILE_CACHE_BYTES)
+        except RuntimeError:  # only the tiled storage managers have a cache
+            pass
+
+@lru_cache(maxsize=8)
+def load_ms_columns(ms_path, t=None):
+    own_table = t is None
+    if own_table:
+        t = open_table(ms_path)
     colnames = t.colnames()
     desc = t.coldesc()
     vis_colinfo = {}
@@ -22,52 +81,290 @@ def load_ms_columns(ms_path):
             n_corr = shape[-1] if len(shape) >= 1 else 1
             n_chan = shape[-2] if len(shape) >= 2 else 1
             vis_colinfo[c] = {"shape": shape, "n_corr": n_corr, "n_chan": n_chan}
-    t.close()
+    if own_table:
+        t.close()
     return colnames, vis_colinfo
 
-def load_ms_data(ms_path, usecols, corr_idx=None, flag_col=None):
-    t = table(ms_path)
+def cell_size(t, col):
+    # Number of elements per row of col
+    if t.nrows() == 0 or t.isscalarcol(col):
+        return 1
+    shape = t.getcolshapestring(col, nrow=1)[0]   # e.g. '[4, 64]'
+    return int(np.prod([int(s) for s in shape.strip('[]').split(',')]))
+
+def get_data_max_rows(t, col, max_elements=MAX_ELEMENTS):
+    # getcol() silently corrupts reads of more than 2**29 elements
+    return max(1, max_elements // cell_size(t, col))
+
+@njit(parallel=True, cache=True)
+def amplitude(z):
+    # |z| of complex64 viewed as interleaved float32 (re, im) pairs, in one pass
+    out = np.empty(z.size // 2, np.float32)
+    for i in prange(out.size):
+        out[i] = np.sqrt(z[2 * i] * z[2 * i] + z[2 * i + 1] * z[2 * i + 1])
+    return out
+
+def to_plottable(col, data):
+    # Real single-precision values: visibilities as amplitudes, float64 downcast
+    if col in VIS_COLUMNS:
+        if data.dtype == np.complex64:
+            data = np.ascontiguousarray(data)
+            return amplitude(data.reshape(-1).view(np.float32)).reshape(data.shape)
+        return np.abs(data).astype(np.float32, copy=False)
+    if data.dtype == np.float64 and col not in PRECISE_COLUMNS:
+        return data.astype(np.float32)
+    return data
+
+def read_corr_planes(t, col, rows_per_chunk):
+    # (nchan, ncorr) cells -> {corr_idx: contiguous (nrow, nchan) plane}, written
+    # chunk by chunk into one preallocated (ncorr, nrow, nchan) array. Reads are kept
+    # to CACHE_READ_BYTES (as complex64), so the fill peaks at little over the planes.
+    nrows = t.nrows()
+    rows_per_chunk = max(1, min(rows_per_chunk, CACHE_READ_BYTES // (cell_size(t, col) * 8)))
+    planes = None
+    for start in range(0, nrows, rows_per_chunk):
+        chunk = to_plottable(col, t.getcol(col, startrow=start, nrow=rows_per_chunk))
+        if planes is None:
+            planes = np.empty((chunk.shape[2], nrows, chunk.shape[1]), chunk.dtype)
+        planes[:, start:start + len(chunk)] = chunk.transpose(2, 0, 1)
+    return {i: planes[i] for i in range(len(planes))}
+
+def column_cache_nbytes():
+    return sum(a.nbytes for e in column_cache.values() for planes in e if planes
+               for a in planes.values())
+
+def cached_vis_column(t, ms_path, col, flag_col, rows_per_chunk):
+    # Per-correlation planes of a column and its flags, or None if over the cache budget
+    key = (ms_path, col, flag_col)
+    with column_cache_lock:
+        if key in column_cache:
+            column_cache.move_to_end(key)
+            return column_cache[key]
+    nrows = t.nrows()
+    if nrows == 0 or t.getcoldesc(col).get('ndim') != 2:
+        return None
+    itemsize = 4 + (1 if flag_col else 0)  # float32 amplitude + bool flag
+    nbytes = nrows * cell_size(t, col) * itemsize
+    if nbytes > COLUMN_CACHE_BYTES:
+        return None
+    with column_cache_lock:
+        # Make room before reading so the cache never exceeds its budget
+        while column_cache and column_cache_nbytes() + nbytes > COLUMN_CACHE_BYTES:
+            column_cache.popitem(last=False)
+    entry = (read_corr_planes(t, col, rows_per_chunk),
+             read_corr_planes(t, flag_col, rows_per_chunk) if flag_col else None)
+    with column_cache_lock:
+        column_cache[key] = entry
+    return entry
+
+def clear_column_cache():
+    with column_cache_lock:
+        column_cache.clear()
+
+@njit(parallel=True, cache=True)
+def unflagged_offsets(flags):
+    # Start of each row's unflagged cells in the compacted output
+    nrow, ncell = flags.shape
+    counts = np.zeros(nrow + 1, np.int64)
+    for i in prange(nrow):
+        n = 0
+        for j in range(ncell):
+            if not flags[i, j]:
+                n += 1
+        counts[i + 1] = n
+    return np.cumsum(counts)
+
+@njit(parallel=True, cache=True)
+def gather_unflagged(flags, offsets, cols, outs, ncols):
+    # Unflagged values of up to GATHER_SLOTS (nrow, ncell) columns, all written in the
+    # same pass over the flags; slots past ncols are padding and never touched
+    nrow, ncell = flags.shape
+    for i in prange(nrow):
+        k = offsets[i]
+        for j in range(ncell):
+            if not flags[i, j]:
+                outs[0][k] = cols[0][i, j]
+                if ncols > 1:
+                    outs[1][k] = cols[1][i, j]
+                if ncols > 2:
+                    outs[2][k] = cols[2][i, j]
+                if ncols > 3:
+                    outs[3][k] = cols[3][i, j]
+                k += 1
+
+def gather_cols(flags, cols):
+    # Compact (nrow, ncell) columns by the flags: one counting pass, then one gather
+    # pass per GATHER_SLOTS columns (X, Y, group and flag fit in one)
+    offsets = unflagged_offsets(flags)
+    outs = [np.empty(offsets[-1], c.dtype) for c in cols]
+    for s in range(0, len(cols), GATHER_SLOTS):
+        group, group_outs = cols[s:s + GATHER_SLOTS], outs[s:s + GATHER_SLOTS]
+        npad = GATHER_SLOTS - len(group)
+        gather_unflagged(flags, offsets,
+                         tuple(group) + (np.empty((0, 0), np.bool_),) * npad,
+                         tuple(group_outs) + (np.empty(0, np.bool_),) * npad,
+                         len(group))
+    return outs
+
+def read_corr_chunk(tc, startrow, nrow, corr_idx=None):
+    # Read only the selected correlation plane of (nchan, ncorr) cells,
+    # sliced in the storage manager via the column's ArrayColumn
+    if corr_idx is not None and tc.getdesc().get('ndim') == 2:
+        return tc.getcolslice(blc=[0, corr_idx], trc=[-1, corr_idx],
+                              startrow=startrow, nrow=nrow)
+    return tc.getcol(startrow=startrow, nrow=nrow)
+
+def load_ms_data(ms_path, usecols, corr_idx=None, flag_col=None, t=None):
+    own_table = t is None
+    if own_table:
+        t = open_table(ms_path)
+    usecols = list(dict.fromkeys(usecols))  # e.g. X == Y: read it once
+    if not (flag_col and flag_col in t.colnames()):
+        flag_col = None
+    readcols = list(usecols) + ([flag_col] if flag_col else [])
+    nrows = t.nrows()
+    rows_per_chunk = min(get_data_max_rows(t, c) for c in readcols)
+    limit_tile_cache(t, readcols)
     arrs = {}
     for c in usecols:
-        if c in VIS_COLUMNS:  # Vis column with correlation axis
-            data = t.getcol(c)
-            if data.ndim == 3 and corr_idx is not None:
-                data = data[:, :, corr_idx]
-            arrs[c] = data.flatten()
+        if c not in VIS_COLUMNS or corr_idx is None:
+            continue
+        cached = cached_vis_column(t, ms_path, c, flag_col, rows_per_chunk)
+        if cached is None:
+            continue
+        # Selected correlation straight from memory: contiguous, no re-read
+        data = cached[0][corr_idx]
+        if cached[1] is not None:
+            arrs[c] = gather_cols(cached[1][corr_idx], [data])[0]
+        else:
+            arrs[c] = data.ravel()
+    chunkcols = [c for c in usecols if c not in arrs]
+    chunks = {c: [] for c in chunkcols}
+    tcols = {c: tablecolumn(t, c) for c in chunkcols + ([flag_col] if flag_col else [])}
+    # Per-cell columns (visibilities) set the points; per-row ones are repeated to match.
+    # The flag column, always passed in by run_plot, follows whichever of the two applies
+    percell = any(not t.isscalarcol(c) for c in usecols if c != flag_col)
+    if percell and not flag_col and nrows:
+        ref = next(c for c in usecols if not t.isscalarcol(c))
+        ncell = int(np.prod(read_corr_chunk(tablecolumn(t, ref), 0, 1, corr_idx).shape[1:]))
+    for start in range(0, nrows if chunkcols else 0, rows_per_chunk):
+        flags = read_corr_chunk(tcols[flag_col], start, rows_per_chunk, corr_idx) if flag_col else None
+        # The flag column as an axis reuses the chunk already read for masking
+        datas = [flags if c == flag_col else
+                 to_plottable(c, read_corr_chunk(tcols[c], start, rows_per_chunk, corr_idx))
+                 for c in chunkcols]
+        if not percell:
+            if flags is not None:
+                # Only per-row columns: drop rows with every cell flagged
+                rowflags = flags.reshape(len(flags), -1).all(axis=1)
+                datas = [rowflags if c == flag_col else data for c, data in zip(chunkcols, datas)]
+                datas = gather_cols(rowflags[:, None], [data[:, None] for data in datas])
         else:
-            data = t.getcol(c)
-            if np.ndim(data) > 1:
-                data = data.flatten()
-            arrs[c] = data
-    # Apply flag masking
-    if flag_col and flag_col in t.colnames():
-        flags = t.getcol(flag_col)
-        if flags.ndim == 3 and corr_idx is not None:
-            flags = flags[:, :, corr_idx]
-        mask = ~flags.flatten()
-        for k in arrs.keys():
-            arrs[k] = arrs[k][mask]
-    t.close()
-    return pd.DataFrame(arrs)
-
-def get_corr_labels(ms_path, vis_col):
+            shape = (len(datas[0]), ncell) if flags is None else (len(flags), flags[0].size)
+            cells = []
+            for c, data in zip(chunkcols, datas):
+                if data.ndim == 1:  # one value per row: repeat it for every cell
+                    data = np.broadcast_to(data[:, None], shape)
+                data = data.reshape(len(data), -1)
+                if data.shape != shape:
+                    raise ValueError(f"{c} cells {data.shape[1:]} do not match the plotted cells {shape[1:]}")
+                cells.append(data)
+            if flags is None:
+                # No flags: no mask to apply, just flatten
+                datas = [data.reshape(-1) for data in cells]
+            else:
+                # Apply flag masking
+                datas = gather_cols(flags.reshape(shape), cells)
+        for c, data in zip(chunkcols, datas):
+            chunks[c].append(data)
+    if own_table:
+        t.close()
+    for k, v in chunks.items():
+        arrs[k] = np.concatenate(v) if v else np.array([])
+    return {c: arrs[c] for c in usecols}
+
+@lru_cache(maxsize=8)
+def get_corr_labels(ms_path, vis_col, t=None):
     pol_path = os.path.join(ms_path, "POLARIZATION")
-    t = None
+    pt = None
     try:
-        t = table(pol_path)
-        corr_types = t.getcol("CORR_TYPE")[0]   # shape: (n_corr,)
-        CORR_MAP = {5: "RR", 6: "RL", 7: "LR", 8: "LL",
-                    9: "XX", 10: "XY", 11: "YX", 12: "YY"}
-        corr_names = [CORR_MAP.get(c, str(c)) for c in corr_types]
+        pt = open_table(pol_path)
+        corr_types = np.asarray(pt.getcol("CORR_TYPE")[0])   # shape: (n_corr,)
+        known = (corr_types >= 0) & (corr_types < len(CORR_NAMES))
+        names = CORR_NAMES[np.where(known, corr_types, 0)]
+        names[~known] = corr_types[~known].astype(str)
+        corr_names = list(names)
     except Exception:
         # fallback: 0, 1, 2, ...
-        colnames, vis_colinfo = load_ms_columns(ms_path)
+        colnames, vis_colinfo = load_ms_columns(ms_path, t=t)
         n_corr = vis_colinfo.get(vis_col, {}).get('n_corr', 4)
         corr_names = [str(i) for i in range(n_corr)]
     finally:
-        if t: t.close()
+        if pt: pt.close()
     return corr_names
 
+def build_pyramid(agg):
+    top = PYRAMID_LEVELS[-1]
+    ydim, xdim = agg.dims
+    return {level: agg if level == top else
+            agg.coarsen({xdim: top // level, ydim: top // level}).sum()
+            for level in PYRAMID_LEVELS}
+
+def pyramid_extent(pyramid):
+    # (x0, x1, y0, y1) of the aggregated canvas, from its own bin centres; datashader
+    # widens zero-width data ranges, so this can differ from the data min/max
+    agg = pyramid[PYRAMID_LEVELS[-1]]
+    ydim, xdim = agg.dims
+    xs, ys = agg.coords[xdim].values, agg.coords[ydim].values
+    dx, dy = xs[1] - xs[0], ys[1] - ys[0]
+    return xs[0] - dx / 2, xs[-1] + dx / 2, ys[0] - dy / 2, ys[-1] + dy / 2
+
+def shade_view(pyramid, x_range=None, y_range=None):
+    # image_rgba data for the visible region, from the coarsest level that covers
+    # at least one bin per screen pixel; None if nothing is in view. Zoomed in past
+    # the finest level, its bins are just cropped and drawn larger: the data is not
+    # re-aggregated, so detail is limited to PYRAMID_LEVELS[-1]x the plot resolution.
+    x0, x1, y0, y1 = pyramid_extent(pyramid)
+    vx0, vx1 = x_range or (x0, x1)
+    vy0, vy1 = y_range or (y0, y1)
+    zoom = 1
+    if vx1 > vx0:
+        zoom = max(zoom, (x1 - x0) / (vx1 - vx0))
+    if vy1 > vy0:
+        zoom = max(zoom, (y1 - y0) / (vy1 - vy0))
+    level = next((l for l in PYRAMID_LEVELS if l >= zoom), PYRAMID_LEVELS[-1])
+    agg = pyramid[level]
+    ydim, xdim = agg.dims
+    xs, ys = agg.coords[xdim].values, agg.coords[ydim].values
+    dx, dy = xs[1] - xs[0], ys[1] - ys[0]
+    agg = agg.sel({xdim: slice(vx0 - dx / 2, vx1 + dx / 2),
+                   ydim: slice(vy0 - dy / 2, vy1 + dy / 2)})
+    if 0 in agg.shape:
+        return None
+    xs, ys = agg.coords[xdim].values, agg.coords[ydim].values
+    # Packed uint32 RGBA, row 0 at the lowest y: already Bokeh's image_rgba layout
+    img = tf.shade(agg, cmap=fire, how="linear")
+    return dict(
+        image=[np.ascontiguousarray(img.data, dtype=np.uint32)],
+        x=[xs[0] - dx / 2],
+        y=[ys[0] - dy / 2],
+        dw=[len(xs) * dx],
+        dh=[len(ys) * dy],
+    )
+
+def compute_plot(ms_path, usecols, xcol, ycol, corr_idx=None, flag_col=None, t=None):
+    # Runs on the executor thread; returns (pyramid, npoints) or None
+    arrs = load_ms_data(ms_path, usecols, corr_idx=corr_idx, flag_col=flag_col, t=t)
+    x, y = arrs[xcol], arrs[ycol]
+    if len(x) == 0:
+        return None
+    # Only the two axis columns, partitioned so datashader aggregates on up to all
+    # cores; fixed 'x'/'y' names keep X == Y as two columns with distinct dims
+    npartitions = max(1, min(os.cpu_count() or 1, len(x) // MIN_PARTITION_POINTS))
+    points = dd.from_dict({'x': x, 'y': y}, npartitions=npartitions)
+    pyramid = build_pyramid(CANVAS.points(points, 'x', 'y', agg=REDUCTION))
+    return pyramid, len(x)
+
 def bokeh_app(doc):
     # Initial GUI: file input and status only
     info_div = Div(text="<b>Enter/paste full path to your Measurement Set (.ms directory), then click Load.</b>")
@@ -84,6 +381,17 @@ def bokeh_app(doc):
     ))
     doc.title = "scribble: Measurement Set Plotter"
 
+    # MS table handle shared by all callbacks of this session
+    selected_ms = {}
+
+    def close_ms(*args):
+        t = selected_ms.pop('table', None)
+        if t is not None:
+            # Queued behind any plot job still reading from the handle
+            executor.submit(t.close)
+
+    doc.on_session_destroyed(close_ms)
+
     # --- Loading logic ---
     def on_load():
         path = ms_path_input.value.strip()
@@ -94,23 +402,48 @@ def bokeh_app(doc):
 
         status_div.text = f"<b style='color:green;'>Loaded: {os.path.abspath(path)}</b>"
 
+        # (Re)loading an MS always re-reads its metadata
+        load_ms_columns.cache_clear()
+        get_corr_labels.cache_clear()
+        clear_column_cache()
+        close_ms()
+        ms_table = selected_ms['table'] = open_table(path)
+
         # Build dynamic selectors and plot controls
-        colnames, vis_colinfo = load_ms_columns(path)
+        colnames, vis_colinfo = load_ms_columns(path, t=ms_table)
         axis_opts = [c for c in colnames if c != 'FLAG']
         flag_col = 'FLAG' if 'FLAG' in colnames else None
         vis_columns_avail = [c for c in VIS_COLUMNS if c in colnames]
 
-        select_x = Select(title="X Axis", options=axis_opts, value=axis_opts[0])
-        select_y = Select(title="Y Axis", options=axis_opts, value=axis_opts[1])
+        precision_note = ("Values are plotted in single precision (TIME excepted); "
+                          "visibility columns are plotted as amplitudes.")
+        select_x = Select(title="X Axis", options=axis_opts, value=axis_opts[0],
+                          description=precision_note)
+        select_y = Select(title="Y Axis", options=axis_opts, value=axis_opts[1],
+                          description=precision_note)
         select_group = Select(title="Group by", options=["None"]+axis_opts, value="None")
         select_corr = MultiSelect(title="Correlation(s)", options=[], value=[], visible=False)
         filter_div = Div(text=f"<b>Flag filtering enabled: only unflagged visibilities plotted.</b>")
         plot_button = Button(label="Plot", button_type="success")
         export_button = Button(label="Export as PNG", button_type="primary", disabled=True)
         plot_status = Div(text="")
-        outfig = figure(width=800, height=450, title="Scribble Plot", 
+        # Explicit ranges: the image is replaced by crops on pan/zoom, so ranges that
+        # followed the renderer would make Reset fit the last crop, not the full data
+        outfig = figure(width=PLOT_WIDTH, height=PLOT_HEIGHT, title="Scribble Plot", 
+                        x_range=Range1d(0, 1), y_range=Range1d(0, 1),
                         tools="pan,wheel_zoom,box_zoom,reset,save")
         render = outfig.image_rgba([], x=[], y=[], dw=[], dh=[])
+        plot_state = {}  # aggregation pyramid of the current plot
+
+        def update_view(event):
+            # Pan/zoom: re-shade the visible region from the pyramid, no re-aggregation
+            if 'pyramid' not in plot_state:
+                return
+            image = shade_view(plot_state['pyramid'], (event.x0, event.x1), (event.y0, event.y1))
+            if image is not None:
+                render.data_source.data = image
+
+        outfig.on_event(RangesUpdate, update_view)
 
         def update_corr_visibility(*args):
             xval, yval = select_x.value, select_y.value
@@ -120,7 +453,7 @@ def bokeh_app(doc):
             select_corr.visible = any_vis
             if any_vis:
                 viscol = xval if inx else yval
-                corr_labels = get_corr_labels(path, viscol)
+                corr_labels = list(get_corr_labels(path, viscol, t=ms_table))
                 select_corr.options = corr_labels
                 if not select_corr.value or set(select_corr.value) - set(corr_labels):
                     select_corr.value = [corr_labels[0]]
@@ -140,35 +473,41 @@ def bokeh_app(doc):
             if usecorr and select_corr.visible:
                 corr_labels = select_corr.options
                 corr_idx = corr_labels.index(usecorr[0])
-            usecols = set([xcol, ycol])
-            if groupcol: usecols.add(groupcol)
-            if flag_col: usecols.add(flag_col)
-            for v in vis_columns_avail:
-                if xcol == v or ycol == v:
-                    usecols.add(v)
+            # Fixed X, Y, group, flag order gives casacore a predictable access pattern
+            vis_cols_needed = tuple(v for v in vis_columns_avail if v in (xcol, ycol))
+            usecols = []
+            for c in (xcol, ycol, groupcol, flag_col) + vis_cols_needed:
+                if c and c not in usecols:
+                    usecols.append(c)
+            plot_button.disabled = True
+            plot_status.text = "Loading and aggregating MS data..."
+            future = executor.submit(compute_plot, path, usecols, xcol, ycol,
+                                     corr_idx=corr_idx, flag_col=flag_col, t=ms_table)
+            future.add_done_callback(
+                lambda fut: doc.add_next_tick_callback(partial(update_render, fut, xcol, ycol, usecorr)))
+
+        def update_render(future, xcol, ycol, usecorr):
+            plot_button.disabled = False
             try:
-                df = load_ms_data(path, list(usecols), corr_idx=corr_idx, flag_col=flag_col)
+                result = future.result()
             except Exception as e:
                 plot_status.text = f"<span style='color:red;'>Error loading MS data: {e}</span>"
                 return
-            if df.empty:
+            if result is None:
+                plot_status.text = "<span style='color:red;'>No data to plot (all flagged?)</span>"
+                return
+            pyramid, npoints = result
+            image = shade_view(pyramid)
+            if image is None:
                 plot_status.text = "<span style='color:red;'>No data to plot (all flagged?)</span>"
                 return
-            cvs = ds.Canvas(plot_width=800, plot_height=450)
-            agg = cvs.points(df, xcol, ycol)
-            img = tf.shade(agg, cmap="fire", how="linear").to_pil()
-            arr = np.array(img.convert("RGBA"))
-            arr = np.flipud(arr)
-            buf = np.dstack([arr[:,:,i] for i in range(4)]).view(np.uint32)[...,0]
-            render.data_source.data = dict(
-                image=[buf],
-                x=[df[xcol].min()],
-                y=[df[ycol].min()],
-                dw=[df[xcol].max()-df[xcol].min()],
-                dh=[df[ycol].max()-df[ycol].min()],
-            )
+            plot_state['pyramid'] = pyramid
+            x0, x1, y0, y1 = (float(v) for v in pyramid_extent(pyramid))
+            outfig.x_range.update(start=x0, end=x1, reset_start=x0, reset_end=x1)
+            outfig.y_range.update(start=y0, end=y1, reset_start=y0, reset_end=y1)
+            render.data_source.data = image
             outfig.title.text = f"{xcol} vs {ycol}" + (f" ({usecorr[0]})" if usecorr else "")
-            plot_status.text = f"Plotted {len(df)} points."
+            plot_status.text = f"Plotted {npoints} points."
             export_button.disabled = False
 
         plot_button.on_click(run_plot)
@@ -9,9 +9,12 @@ setup(
     install_requires=[
         "bokeh",
         "datashader",
+        "colorcet",
+        "dask[dataframe]",
         "pandas",
         "python-casacore",
-        "numpy"
+        "numpy",
+        "numba"
     ],
     entry_points={
         'console_scripts': [